@@ -0,0 +1,3 @@
+# Shared engine for the Site Bot demo: DB, tools and router logic live
+# here so UI entrypoints stay thin and never duplicate them. Nothing in
+# this package imports Streamlit.
@@ -0,0 +1,63 @@
+import functools
+import sqlite3
+
+# Knowledge Base
+KNOWLEDGE_BASE = """
+We are 'FutureTech Solutions'.
+Open Mon-Fri, 9am-5pm.
+Contact: support@futuretech.com.
+We sell AI hardware for enthusiasts.
+Returns are accepted within 30 days.
+"""
+
+# lru_cache makes this a process-wide singleton, so the in-memory DB
+# survives Streamlit reruns (modules are only imported once) and the CLI
+# path pays for setup exactly once.
+@functools.lru_cache(maxsize=1)
+def get_db_connection():
+    # Bump the per-connection prepared-statement cache (default 128) so the
+    # tool queries stay compiled across calls, and make sure no trace
+    # callback slows down execute().
+    conn = sqlite3.connect(":memory:", cached_statements=256, check_same_thread=False)
+    conn.set_trace_callback(None)
+    cursor = conn.cursor()
+
+    # In-memory tuning: no journal/fsync ceremony, temp data stays in RAM,
+    # and a single exclusive holder (we are the only connection).
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA locking_mode=EXCLUSIVE")
+
+    # Init Tables
+    # WITHOUT ROWID: products is only ever looked up by its PK, so skip
+    # the rowid indirection.
+    cursor.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER, price REAL) WITHOUT ROWID")
+    cursor.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id TEXT, status TEXT, total REAL)")
+    # The only filtered query is orders-by-user; index it so it stays
+    # O(log n) as orders grow instead of a full table scan.
+    cursor.execute("CREATE INDEX idx_orders_user ON orders(user_id)")
+
+    # Seed Data -- executemany inside one explicit transaction: one parse
+    # per statement, one commit for the whole seed.
+    cursor.execute("BEGIN")
+    cursor.executemany("INSERT INTO products VALUES (?,?,?,?)", [
+        (1, 'AI Widget Pro', 50, 99.00),
+        (2, 'Neural Chip', 10, 499.00),
+    ])
+    cursor.executemany("INSERT INTO orders VALUES (?,?,?,?)", [
+        (101, 'client_diya', 'Shipped', 99.00),
+        (102, 'client_bob', 'Processing', 499.00),
+        (103, 'client_diya', 'Delivered', 198.00),
+    ])
+
+    # Full-text index over the Knowledge Base, built once at startup, so
+    # the search tool returns only the matching lines instead of the
+    # whole KB (smaller prompts = cheaper/faster LLM calls).
+    cursor.execute("CREATE VIRTUAL TABLE kb USING fts5(content)")
+    cursor.executemany(
+        "INSERT INTO kb VALUES (?)",
+        [(line,) for line in KNOWLEDGE_BASE.strip().splitlines()],
+    )
+    conn.commit()
+    return conn
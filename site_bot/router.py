@@ -0,0 +1,104 @@
+import datetime
+import functools
+import re
+import time
+from zoneinfo import ZoneInfo  # Explicitly import ZoneInfo
+
+from site_bot.tools import (
+    check_inventory,
+    get_admin_sales_report,
+    get_my_orders,
+    search_knowledge_base,
+)
+
+# Role bundles are built ONCE at import time, so the router doesn't
+# re-allocate tool lists and instruction strings on every call.
+VISITOR_TOOLS = (search_knowledge_base,)
+ADMIN_TOOLS = (search_knowledge_base, get_admin_sales_report, check_inventory)
+
+VISITOR_SUFFIX = " You are a Receptionist. Answer general questions. Do not discuss specific orders."
+CLIENT_SUFFIX = " You are a Support Agent helping {uid}. You can check their orders."
+ADMIN_SUFFIX = " You are the General Manager. You have full access."
+
+# Static part of the system instruction; only the timestamp changes per turn.
+BASE_IDENTITY_TMPL = """
+Current Day/Time: {now}.
+You represent 'FutureTech Solutions'.
+CRITICAL: For questions about hours, policies, or contact info, you MUST use the 'search_knowledge_base' tool.
+Do not guess.
+"""
+
+# MoE-style routing: classify the message with cheap compiled regexes and
+# pick the smallest model that can handle it. Trivial visitor FAQ lookups
+# skip the LLM entirely (the single biggest latency win available here).
+INTENT_PATTERNS = (
+    ("kb_only", re.compile(r"\b(hours?|open|close|when|contact|email|reach|return|refund|polic(?:y|ies))\b", re.I)),
+    ("order_lookup", re.compile(r"\b(orders?|shipp(?:ed|ing)|deliver(?:y|ed)?|track)\b", re.I)),
+    ("admin_sql", re.compile(r"\b(sales|revenue|report|inventory|stock)\b", re.I)),
+)
+
+INTENT_MODELS = {
+    "kb_only": "gemini-2.0-flash-lite",
+    "order_lookup": "gemini-2.0-flash-lite",
+    "admin_sql": "gemini-2.0-flash",
+    "chat": "gemini-2.0-flash",
+}
+
+def classify_intent(message: str) -> str:
+    for intent, pattern in INTENT_PATTERNS:
+        if pattern.search(message):
+            return intent
+    return "chat"
+
+# Canned answers for the visitor FAQ set: a compiled-regex scan answers
+# in single-digit ms what would otherwise be a full LLM round-trip.
+FAQ = (
+    (re.compile(r"\b(hours?|open|close|when)\b", re.I), "We're open Mon-Fri, 9am-5pm."),
+    (re.compile(r"\b(contact|email|reach|support)\b", re.I), "Contact us at support@futuretech.com."),
+    (re.compile(r"\b(returns?|refund|polic(?:y|ies))\b", re.I), "Returns are accepted within 30 days."),
+)
+
+def match_faq(message: str):
+    """Return the canned FAQ answer for `message`, or None on a miss."""
+    for pattern, answer in FAQ:
+        if pattern.search(message):
+            return answer
+    return None
+
+IST_ZONE = ZoneInfo("Asia/Kolkata")
+
+@functools.lru_cache(maxsize=1)
+def _now_str(bucket: int):
+    # `bucket` is just the cache key (30s granularity) -- strftime does
+    # locale lookups and format parsing, so don't re-run it per call.
+    # Get current time string (e.g., "Monday, 14:30")
+    return datetime.datetime.now(IST_ZONE).strftime("%A, %H:%M")
+
+def build_base_identity():
+    return BASE_IDENTITY_TMPL.format(now=_now_str(int(time.time() // 30)))
+
+@functools.lru_cache(maxsize=32)
+def _client_bundle(user_id: str):
+    # Only the client role needs a per-user callable (the tool must be
+    # bound to the logged-in user). functools.partial won't do: the genai
+    # SDK reads __name__/__doc__ off tool callables, so bind via a named
+    # closure and memoize it per user instead of allocating one per turn.
+    def safe_get_orders():
+        return get_my_orders(user_id)
+    return (search_knowledge_base, safe_get_orders), CLIENT_SUFFIX.format(uid=user_id)
+
+# Role -> (tools, suffix) dispatch, built once; the router body is a dict
+# lookup instead of an if/elif chain re-run on every message.
+ROLE_DISPATCH = {
+    "visitor": lambda uid: (VISITOR_TOOLS, VISITOR_SUFFIX),
+    "client": _client_bundle,
+    "admin": lambda uid: (ADMIN_TOOLS, ADMIN_SUFFIX),
+}
+
+def build_tools_and_instruction(role: str, user_id: str):
+    """Return the (tools, system_instruction) bundle for a role."""
+    try:
+        tools, suffix = ROLE_DISPATCH[role](user_id)
+    except KeyError:
+        raise ValueError(f"Unknown role: {role}") from None
+    return tools, build_base_identity() + suffix
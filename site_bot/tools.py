@@ -0,0 +1,90 @@
+import functools
+import re
+import sqlite3
+import time
+
+from site_bot.db import KNOWLEDGE_BASE, get_db_connection
+
+cursor = get_db_connection().cursor()
+
+# SQL hoisted to constants: sqlite3's statement cache is keyed by the SQL
+# text, so reusing the same str object guarantees a cache hit.
+# Formatting happens inside SQLite (C code) via printf/group_concat, so
+# Python never loops over the rows -- one fetch, one string.
+SQL_ORDERS_BY_USER = (
+    "SELECT count(*), group_concat(printf('Order #%d (%s) - $%.2f', id, status, total), ', ') "
+    "FROM orders WHERE user_id=?"
+)
+SQL_SALES_REPORT = "SELECT SUM(total), COUNT(*) FROM orders"
+# One scalar, already formatted as 'name: stock' lines -- cheaper for the
+# LLM to read than a Python repr of tuples.
+SQL_INVENTORY = "SELECT group_concat(name || ': ' || stock, char(10)) FROM products"
+SQL_KB_MATCH = "SELECT content FROM kb WHERE kb MATCH ? ORDER BY rank LIMIT 3"
+
+# Function words would MATCH KB boilerplate ("we", "are", ...) and defeat
+# the zero-hit -> full-KB fallback exactly when it's needed; strip them
+# before building the MATCH expression.
+KB_STOPWORDS = frozenset(
+    "a about an and are be can could do does for from how i in is it me my "
+    "of on or our please so that the this to us was we what when where "
+    "which who why will with you your".split()
+)
+
+# The LLM often repeats identical tool calls mid-conversation; memoize
+# them. The KB tool is pure (lru_cache); the SQL tools are idempotent
+# over short windows, so a small TTL cache skips the parse+execute.
+TOOL_CACHE_STATS = {"hits": 0, "misses": 0}
+
+def ttl_cache(seconds):
+    def decorator(fn):
+        store = {}
+        @functools.wraps(fn)
+        def wrapper(*args):
+            now = time.monotonic()
+            cached = store.get(args)
+            if cached is not None and cached[1] > now:
+                TOOL_CACHE_STATS["hits"] += 1
+                return cached[0]
+            TOOL_CACHE_STATS["misses"] += 1
+            value = fn(*args)
+            store[args] = (value, now + seconds)
+            return value
+        return wrapper
+    return decorator
+
+@functools.lru_cache(maxsize=64)
+def search_knowledge_base(query: str):
+    # FTS5 match on the query words; punctuation is stripped because raw
+    # user input is not valid MATCH syntax.
+    words = [w for w in re.findall(r"\w+", query.lower()) if w not in KB_STOPWORDS]
+    if words:
+        try:
+            # Stream straight off the lazy cursor: fetchone gives the
+            # early-return check and the join consumes the rest without
+            # materializing an intermediate row list.
+            res = cursor.execute(SQL_KB_MATCH, (" OR ".join(words),))
+            first = res.fetchone()
+            if first is not None:
+                return "\n".join([first[0], *(r[0] for r in res)])
+        except sqlite3.OperationalError:
+            pass
+    # Graceful degradation: no hits -> fall back to the full KB.
+    return KNOWLEDGE_BASE
+
+@ttl_cache(seconds=10)
+def get_my_orders(user_id: str):
+    cnt, text = cursor.execute(SQL_ORDERS_BY_USER, (user_id,)).fetchone()
+    if not cnt:
+        return "No orders found."
+    return f"Found {cnt} orders: {text}"
+
+@ttl_cache(seconds=30)
+def get_admin_sales_report():
+    res = cursor.execute(SQL_SALES_REPORT)
+    row = res.fetchone()
+    return f"Total Revenue: ${row[0]}, Total Orders: {row[1]}"
+
+@ttl_cache(seconds=30)
+def check_inventory():
+    row = cursor.execute(SQL_INVENTORY).fetchone()
+    return row[0] or "No products found."
@@ -1,10 +1,20 @@
+import collections
+import hashlib
+import time
+import os
+
+import httpx
 import streamlit as st
-import sqlite3
-import datetime
-from zoneinfo import ZoneInfo # Explicitly import ZoneInfo
 from google import genai
-from google.genai import types
-import os
+from google.genai import errors, types
+
+from site_bot.router import (
+    INTENT_MODELS,
+    build_tools_and_instruction,
+    classify_intent,
+    match_faq,
+)
+from site_bot.tools import search_knowledge_base
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Intelligent Site Bot", layout="wide")
@@ -13,78 +23,77 @@ st.title("🤖 3-Brain Business Bot")
 with st.expander("💡 About this Demo:"):
     st.markdown("""
     This application showcases **Secure Enterprise AI Architecture** with **Role-Based Routing**.
-    
+
     Instead of a "one-size-fits-all" bot, this system dynamically switches its "Brain" (System Instruction & Tools) based on who is logged in. It connects safely to a **SQL Database** to answer transactional queries (like "Where is my order?") without exposing sensitive Admin data to public visitors.
-    
+
     **Role:** Architected the **Router Logic** that switches toolsets based on identity (Visitor/Client/Admin) and implemented Context-Awareness (Time Zone detection), demonstrating how to deploy AI safely in a corporate environment.
     """)
 
-# --- PART 1: THE PERSISTENT DATABASE ---
-# We use @st.cache_resource so the DB isn't wiped every time you click a button
-@st.cache_resource
-def get_db_connection():
-    conn = sqlite3.connect(":memory:", check_same_thread=False)
-    cursor = conn.cursor()
-    
-    # Init Tables
-    cursor.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER, price REAL)")
-    cursor.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id TEXT, status TEXT, total REAL)")
-    
-    # Seed Data
-    cursor.execute("INSERT INTO products VALUES (1, 'AI Widget Pro', 50, 99.00)")
-    cursor.execute("INSERT INTO products VALUES (2, 'Neural Chip', 10, 499.00)")
-    cursor.execute("INSERT INTO orders VALUES (101, 'client_diya', 'Shipped', 99.00)")
-    cursor.execute("INSERT INTO orders VALUES (102, 'client_bob', 'Processing', 499.00)")
-    cursor.execute("INSERT INTO orders VALUES (103, 'client_diya', 'Delivered', 198.00)")
-    conn.commit()
-    return conn
-
-conn = get_db_connection()
-cursor = conn.cursor()
-
-# Knowledge Base
-KNOWLEDGE_BASE = """
-We are 'FutureTech Solutions'.
-Open Mon-Fri, 9am-5pm.
-Contact: support@futuretech.com.
-We sell AI hardware for enthusiasts.
-Returns are accepted within 30 days.
-"""
-
-# --- PART 2: THE TOOLS ---
-def search_knowledge_base(query: str):
-    return KNOWLEDGE_BASE
-
-def get_my_orders(user_id: str):
-    # Note: We use the cursor from the global scope/cached connection
-    res = cursor.execute("SELECT id, status, total FROM orders WHERE user_id=?", (user_id,))
-    rows = res.fetchall()
-    if not rows:
-        return "No orders found."
-    return f"Found {len(rows)} orders: " + ", ".join([f"Order #{r[0]} ({r[1]}) - ${r[2]}" for r in rows])
-
-def get_admin_sales_report():
-    res = cursor.execute("SELECT SUM(total), COUNT(*) FROM orders")
-    row = res.fetchone()
-    return f"Total Revenue: ${row[0]}, Total Orders: {row[1]}"
-
-def check_inventory():
-    res = cursor.execute("SELECT name, stock FROM products")
-    return str(res.fetchall())
-
-# --- PART 3: THE ROUTER & UI ---
+# --- THE UI SHELL ---
+# DB, tools and router logic live in the site_bot package (shared with any
+# non-Streamlit entrypoint); this file only wires them to the Streamlit UI.
+
+def record_result(model: str, seconds: float, ok: bool):
+    # Per-model latency and success-rate EWMAs kept in session state;
+    # fallback ordering prefers the healthiest model when one gets flaky.
+    health = st.session_state.setdefault("model_health", {})
+    entry = health.setdefault(model, {"latency": None, "success": 1.0})
+    entry["latency"] = seconds if entry["latency"] is None else 0.8 * entry["latency"] + 0.2 * seconds
+    entry["success"] = 0.8 * entry["success"] + 0.2 * (1.0 if ok else 0.0)
+
+def model_preference(primary: str):
+    # The routed model first, then the other known models as fallbacks,
+    # healthiest (by recent success rate) first.
+    health = st.session_state.get("model_health", {})
+    others = sorted(
+        {m for m in INTENT_MODELS.values() if m != primary},
+        key=lambda m: -health.get(m, {}).get("success", 1.0),
+    )
+    return [primary] + others
+
+def stream_reply(chat, message):
+    # Plain sync generator: write_stream drives it on the script thread
+    # anyway, and the sync httpx pool has no event-loop affinity --
+    # Streamlit converts async generators on a throwaway per-message
+    # loop, which strands the cached client's keep-alive connections on
+    # a closed loop and fails every other turn.
+    for chunk in chat.send_message_stream(message):
+        yield chunk.text or ""
 
 # Get API Key
-if "GOOGLE_API_KEY" in st.secrets:
-    api_key = st.secrets["GOOGLE_API_KEY"]
-else:
-    api_key = os.environ.get("GOOGLE_API_KEY")
+# Memoized so reruns skip the st.secrets (TOML-backed) and environment
+# lookups; resolved once per session.
+@st.cache_data(show_spinner=False)
+def get_api_key():
+    if "GOOGLE_API_KEY" in st.secrets:
+        return st.secrets["GOOGLE_API_KEY"]
+    return os.environ.get("GOOGLE_API_KEY")
+
+api_key = get_api_key()
 
 if not api_key:
     st.error("API Key missing.")
     st.stop()
 
-client = genai.Client(api_key=api_key)
+# Cache the client like the DB connection: TLS handshake + connection
+# setup costs ~50-200ms and reruns shouldn't rebuild it. The key is
+# hashed for the cache (never stored raw), and the sync httpx transport
+# keeps connections alive so role switches reuse the pool. No async
+# keep-alive: all calls go through the sync path, and async pooled
+# connections would bind to Streamlit's throwaway per-message loops.
+_HTTP_ARGS = {"limits": httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60)}
+
+@st.cache_resource(hash_funcs={str: lambda s: hashlib.sha256(s.encode()).digest()})
+def get_client(key):
+    return genai.Client(
+        api_key=key,
+        http_options=types.HttpOptions(
+            timeout=30_000,  # ms; slow requests fail fast into the fallback
+            client_args=_HTTP_ARGS,
+        ),
+    )
+
+client = get_client(api_key)
 
 # Sidebar: Role Selection (The "Login" Simulation)
 st.sidebar.header("Identity Simulation")
@@ -109,8 +118,10 @@ if user_role == "client":
     st.sidebar.success(f"Logged in as: {current_user_id}")
 
 # Chat Interface
+# Bounded history: very long sessions would otherwise grow the transcript
+# (and the per-rerun re-render) without limit.
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = collections.deque(maxlen=200)
 
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
@@ -123,58 +134,64 @@ if prompt := st.chat_input(input_placeholder):
         st.markdown(prompt)
 
 # 2. Router Logic
-    tools = []
-    sys_instruct = ""
-
-    # FIX: Use datetime.datetime.now() with the Timezone
-    # We define the Timezone object
-    ist_zone = ZoneInfo("Asia/Kolkata")
-    
-    # We get the current time in that zone
-    # Notice the double 'datetime.datetime'
-    now_ist = datetime.datetime.now(ist_zone)
-    
-    # Get current time string (e.g., "Monday, 14:30")
-    # now_str = datetime.datetime.now().strftime("%A, %H:%M")
-    now_str = now_ist.strftime("%A, %H:%M")
-
-    # Define the "Base Identity" that applies to everyone
-    # We tell it: You do NOT know the hours. You MUST search.
-    base_identity = f"""
-    Current Day/Time: {now_str}. 
-    You represent 'FutureTech Solutions'.
-    CRITICAL: For questions about hours, policies, or contact info, you MUST use the 'search_knowledge_base' tool. 
-    Do not guess.
-    """
+    intent = classify_intent(prompt)
 
+    # Fast path: visitor FAQs get a canned answer from a regex scan, and
+    # other pure KB questions are answered straight from the index --
+    # either way, no LLM round-trip at all.
     if user_role == "visitor":
-        tools = [search_knowledge_base]
-        sys_instruct = base_identity + " You are a Receptionist. Answer general questions. Do not discuss specific orders."
-        
-    elif user_role == "client":
-        def safe_get_orders(): 
-            return get_my_orders(current_user_id)
-        tools = [search_knowledge_base, safe_get_orders]
-        sys_instruct = base_identity + f" You are a Support Agent helping {current_user_id}. You can check their orders."
-        
-    elif user_role == "admin":
-        tools = [search_knowledge_base, get_admin_sales_report, check_inventory]
-        sys_instruct = base_identity + " You are the General Manager. You have full access."
-        
+        answer = match_faq(prompt)
+        if answer is None and intent == "kb_only":
+            answer = search_knowledge_base(prompt)
+        if answer is not None:
+            with st.chat_message("assistant"):
+                st.markdown(answer)
+            st.session_state.messages.append({"role": "model", "content": answer})
+            st.stop()
+
+    model = INTENT_MODELS[intent]
+    tools, sys_instruct = build_tools_and_instruction(user_role, current_user_id)
+
     # 3. Generate Response
+    # Persistent Chat objects keep tool-call context across turns, so
+    # the model doesn't re-plan (or re-fetch orders) from scratch every
+    # message. One chat per (role, user, model) -- the intent router may
+    # flip the model between consecutive messages, so returning to a
+    # model must resume its history, not recreate it; and a visitor
+    # never inherits an admin session.
+    def get_chat(chat_model):
+        chats = st.session_state.setdefault("chats", {})
+        chat_key = (user_role, current_user_id, chat_model)
+        if chat_key not in chats:
+            chats[chat_key] = client.chats.create(
+                model=chat_model,
+                config=types.GenerateContentConfig(
+                    tools=tools,
+                    system_instruction=sys_instruct,
+                    automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=False)
+                )
+            )
+        return chats[chat_key]
+
     with st.chat_message("assistant"):
         with st.spinner(f"Thinking as {user_role}..."):
             try:
-                response = client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        tools=tools,
-                        system_instruction=sys_instruct,
-                        automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=False)
-                    )
-                )
-                st.markdown(response.text)
-                st.session_state.messages.append({"role": "model", "content": response.text})
+                # Try the routed model, then fall back to the next
+                # healthiest one on server errors or timeouts, so a
+                # transient Gemini hiccup degrades instead of failing.
+                for m in model_preference(model):
+                    start = time.monotonic()
+                    try:
+                        # Render chunks as they arrive; tool-call chunks
+                        # carry no text. write_stream returns the full text.
+                        full = st.write_stream(stream_reply(get_chat(m), prompt))
+                    except (errors.ServerError, httpx.TimeoutException):
+                        record_result(m, time.monotonic() - start, ok=False)
+                        continue
+                    record_result(m, time.monotonic() - start, ok=True)
+                    st.session_state.messages.append({"role": "model", "content": full})
+                    break
+                else:
+                    st.error("All models are currently unavailable. Please try again.")
             except Exception as e:
                 st.error(f"Error: {e}")